@@ -1,25 +1,59 @@
 from subsamplr.core.variable import Variable, CategoricalVariable, DiscreteVariable, ContinuousVariable  # type: ignore
 from subsamplr.core.variable_generator import VariableGenerator  # type: ignore
-from numpy import ones  # type: ignore
-from numpy.random import choice  # type: ignore
-from mpl_toolkits import mplot3d  # type: ignore
-import matplotlib.pyplot as plt  # type: ignore
+from numpy import ones, cumsum, fromiter, searchsorted  # type: ignore
+from numpy import array, asarray, floor, where, flatnonzero  # type: ignore
+from numpy import zeros, argsort, diff, int64, repeat, arange  # type: ignore
+from numpy.random import default_rng  # type: ignore
+from numbers import Number
+from collections import Counter
+from math import isfinite
+
+# Module-level random number generator, constructed once. Calling methods
+# on a Generator instance avoids the lock on the legacy global RNG state.
+_rng = default_rng()
+
+
+def set_rng(rng):
+    """Replace the module-level random number generator.
+
+    Args:
+        rng: A numpy.random.Generator instance, e.g. default_rng(seed),
+             used for reproducible bin selection.
+    """
+    global _rng
+    _rng = rng
 
 
 class Bin:
-    """A multi-dimensional histogram bin. When populated, bins contain 
+    """A multi-dimensional histogram bin. When populated, bins contain
     the names of subsample units but not the associated values. The name
     is assumed to be a key via which the values can be retrieved, e.g.
     a row identifier in tabular data."""
 
-    def __init__(self, parts):
+    # One instance exists per populated bin, so spare the per-instance
+    # __dict__; slot access is also slightly faster on the assignment path.
+    __slots__ = ('parts', 'dedup', 'contents', '_contents_list')
+
+    def __init__(self, parts, dedup=True):
         """Constructor for the Bin class.
 
         Args:
             parts (list): Partition elements defining the bin.
+            dedup (bool): If True, guard against duplicate assignment of the
+                          same unit. If False, contents are stored append-only,
+                          which is cheaper when the caller guarantees units
+                          are unique.
         """
-        self.contents = set()
         self.parts = parts
+        self.dedup = dedup
+        if dedup:
+            self.contents = set()  # type: ignore
+            # List view of the contents, maintained alongside the set so that
+            # samples can be drawn without copying the whole bin per draw.
+            self._contents_list = []  # type: list
+        else:
+            self.contents = []  # type: ignore
+            self._contents_list = self.contents
 
     def __str__(self):
         parts = '; '.join([p.__str__() for p in self.parts])
@@ -30,29 +64,67 @@ class Bin:
         return len(self.contents)
 
     def contains(self, unit):
-        """Check whether this bin contains the given unit."""
+        """Check whether this bin contains the given unit.
+
+        Always False when deduplication is disabled, since no membership
+        set is kept in that case.
+        """
+        if not self.dedup:
+            return False
         return unit in self.contents
 
     def assign(self, unit):
         """Assign a unit to the bin (if it isn't already assigned)."""
-        if self.contains(unit):
-            # TODO:
-            # logging.warn(f"Bin already contains unit {unit}")
+        if not self.dedup:
+            self.contents.append(unit)
             return
+        # set.add is a no-op on duplicates, so one add (checked via the
+        # size) replaces a separate membership probe followed by an add.
+        before = len(self.contents)
         self.contents.add(unit)
+        if len(self.contents) != before:
+            self._contents_list.append(unit)
+
+    def assign_many(self, units):
+        """Assign a batch of units to the bin in one shot.
+
+        Equivalent to calling assign for each unit in turn, but without
+        deduplication the batch is appended with a single list extend.
+
+        Args:
+            units (list): The names of the subsample units.
+        """
+        if not self.dedup:
+            self.contents.extend(units)
+            return
+        for unit in units:
+            self.assign(unit)
 
     def dimensions(self):
         """Return the list of variables defining the dimensions of the bin."""
         return [part.variable for part in self.parts]
-    
-    def pick_units(self, size):
-        """Pick a random sample of units from the bin, without replacement."""
-        return choice(list(self.contents), size=size, replace=False)
+
+    def pick_units(self, size, rng=None):
+        """Pick a random sample of units from the bin, without replacement.
+
+        Args:
+            size (int): The number of units to pick.
+            rng       : Optional. A numpy.random.Generator. Defaults to
+                        the module-level generator, so that one seed set
+                        via set_rng determines the whole selection.
+        """
+        if size > len(self._contents_list):
+            raise ValueError(
+                f"Cannot pick {size} units from a bin of {self.count()}.")
+        indices = (rng or _rng).choice(
+            len(self._contents_list), size=size, replace=False)
+        return [self._contents_list[i] for i in indices]
 
 class BinCollection:
     """A collection of histogram bins."""
 
-    def __init__(self, dimensions, track_exclusions=True):
+    def __init__(self, dimensions, track_exclusions=True, dedup=True,
+                 rng=None):
         """Constructor for the BinCollection class.
 
         Args:
@@ -60,29 +132,103 @@ class BinCollection:
                                      the dimensions of the bin collection.
             track_exclusions (bool): a boolean value indicating whether units
                                      excluded from the collection should be tracked.
+            dedup            (bool): a boolean value indicating whether bins
+                                     should guard against duplicate assignment
+                                     of the same unit. Pass False when units
+                                     are known to be unique to save memory.
+            rng                    : Optional. A numpy.random.Generator used
+                                     for bin selection. If None, the module-
+                                     level generator is used.
         """
-        # Store the bins in a nested dictionary for efficient selection & assignment.
-        self.bins = {}
+        # Store the bins in a flat dictionary keyed by tuples of partition
+        # part indices, one index per dimension.
+        self.bins = {}  # type: dict
         for dim in dimensions:
             if not isinstance(dim, Variable):
                 raise ValueError(
                     "All dimensions elements must be of type Variable.")
         self.dimensions = dimensions
         self.track_exclusions = track_exclusions
+        self.dedup = dedup
+        self.rng = rng
 
         # If track_exclusions is True, create a dictionary to store exclusions.
         if track_exclusions:
             self.exclusions = dict()  # type: dict
 
+        # Cache of cumulative weight arrays used for bin selection, keyed by
+        # key prefix (and, for prescribed weights, by dimension & weights).
+        self._cdf_cache = dict()  # type: dict
+
+        # Incrementally maintained unit counts per key prefix, and the
+        # populated child part indices per prefix (in first-assignment
+        # order), so that weights can be looked up rather than recounted.
+        self._subtree_counts = dict()  # type: dict
+        self._children = dict()  # type: dict
+
+        # Precompute fast part index lookups per dimension. Continuous
+        # dimensions with equal-width contiguous intervals get an arithmetic
+        # (lo, width, n) triple; discrete & categorical dimensions get a
+        # value -> index dictionary.
+        self._uniform = [BinCollection._uniform_params(dim)
+                         for dim in dimensions]
+        self._lookup = [BinCollection._value_lookup(dim)
+                        for dim in dimensions]
+
+        # Precompute float interval endpoints per continuous dimension, and
+        # whether the exact endpoints are representable as floats (in which
+        # case float comparisons agree with exact ones and column lookups
+        # can be fully vectorised).
+        self._float_edges = []  # type: list
+        self._float_exact = []  # type: list
+        for dim, (lo, width, n) in zip(dimensions, self._uniform):
+            if lo is None:
+                self._float_edges.append(None)
+                self._float_exact.append(False)
+                continue
+            lows = array([float(p.endpoints[0]) for p in dim.partition])
+            highs = array([float(p.endpoints[1]) for p in dim.partition])
+            self._float_edges.append((lows, highs))
+            self._float_exact.append(
+                all(float(p.endpoints[0]) == p.endpoints[0]
+                    and float(p.endpoints[1]) == p.endpoints[1]
+                    for p in dim.partition))
+
+        # For continuous dimensions with integer endpoints, precompute a
+        # direct value -> part index table so that integer-valued lookups
+        # become a single array access. Tables are only built while they
+        # remain comfortably cache-resident.
+        max_table_size = 1 << 20
+        self._int_table = []  # type: list
+        for dim, (lo, width, n) in zip(dimensions, self._uniform):
+            if (lo is None or not float(lo).is_integer()
+                    or not float(width).is_integer()
+                    or int(width) * n > max_table_size):
+                self._int_table.append(None)
+                continue
+            self._int_table.append(
+                (int(lo), repeat(arange(n), int(width))))
+
+        # Bit shifts and masks for packing a full set of part indices into
+        # a single integer, used to group units by bin in assign_many.
+        self._shifts, self._masks = BinCollection._packing_params(dimensions)
+        # Packing is only usable when every combination of part indices
+        # fits in an int64; very wide collections group by tuple instead.
+        self._packable = \
+            self._shifts[0] + self._masks[0].bit_length() <= 63
+
+        # Key function specialised to the number of dimensions, with the
+        # loop over dimensions unrolled.
+        self._key_of = self._compile_key_of()
+
     def __str__(self):
         ret = "BinCollection:\n"
         ret += f"Dimensions: {'; '.join([dim.name for dim in self.dimensions])}\n"
-        if self.count_units == 0:
+        if self.count_units() == 0:
             return ret
         ret += "Unit counts:\n"
-        for k, v in self.bins.items():
+        for k, count in self.weight_of_parts((), normalised=False).items():
             part = self.dimensions[0].partition[k]
-            count = v.count() if isinstance(v, Bin) else self.count_units(d=v)
             ret += f"{': '.join([str(part), str(count)])}\n"
         return ret
 
@@ -91,13 +237,166 @@ class BinCollection:
         """Get the index of the given dimension."""
         return self.dimensions.index(dim)
 
+    @staticmethod
+    def _packing_params(dimensions):
+        """Get the bit shifts and masks for packing part indices.
+
+        Each dimension is allotted enough bits for its partition size, with
+        the last dimension in the lowest bits, so that a full set of part
+        indices packs into a single integer via shifts and ORs.
+
+        Args:
+            dimensions (list): The dimensions of the collection.
+
+        Returns:
+            A tuple (shifts, masks) of lists, one entry per dimension.
+        """
+        shifts = []  # type: list
+        masks = []  # type: list
+        shift = 0
+        for dim in reversed(dimensions):
+            bits = max(1, (len(dim.partition) - 1).bit_length())
+            shifts.append(shift)
+            masks.append((1 << bits) - 1)
+            shift += bits
+        shifts.reverse()
+        masks.reverse()
+        return shifts, masks
+
+    def _compile_key_of(self):
+        """Build a bin key function specialised to the dimension count.
+
+        The number of dimensions is fixed at construction, so the loop over
+        dimensions in the per-unit assignment path can be unrolled. The
+        generated function computes the tuple of part indices for one set
+        of values, returning None as soon as a value is out of range.
+
+        Returns:
+            A bound function mapping a value collection to a bin key tuple,
+            or to None if any value falls outside the collection.
+        """
+        n_dims = len(self.dimensions)
+        lines = ["def _key_of(self, values):"]
+        for d in range(n_dims):
+            lines.append(f"    i{d} = self._part_index({d}, values[{d}])")
+            lines.append(f"    if i{d} is None:")
+            lines.append("        return None")
+        indices = ", ".join(f"i{d}" for d in range(n_dims))
+        if n_dims == 1:
+            indices += ","
+        lines.append(f"    return ({indices})")
+        namespace = {}  # type: dict
+        exec("\n".join(lines), namespace)
+        return namespace["_key_of"].__get__(self)
+
+    def _pack(self, indices):
+        """Pack a full set of part indices into a single integer key."""
+        key = 0
+        for shift, i in zip(self._shifts, indices):
+            key |= i << shift
+        return key
+
+    def _unpack(self, key):
+        """Recover the tuple of part indices from a packed integer key."""
+        return tuple((key >> shift) & mask
+                     for shift, mask in zip(self._shifts, self._masks))
+
+    @staticmethod
+    def _uniform_params(dim):
+        """Get the arithmetic lookup parameters for a continuous dimension.
+
+        Args:
+            dim (Variable): One of the dimensions of the collection.
+
+        Returns:
+            A tuple (lo, width, n) where lo is the lower bound of the
+            variable range, width is the common interval width and n is the
+            number of intervals, or (None, None, None) if the dimension is
+            not partitioned into equal-width contiguous intervals.
+        """
+        if not isinstance(dim, ContinuousVariable):
+            return (None, None, None)
+        parts = dim.partition
+        width = parts[0].width()
+        for prev, part in zip(parts, parts[1:]):
+            if part.width() != width or prev.endpoints[1] != part.endpoints[0]:
+                return (None, None, None)
+        return (float(parts[0].endpoints[0]), float(width), len(parts))
+
+    @staticmethod
+    def _value_lookup(dim):
+        """Get a value -> part index dictionary for a dimension.
+
+        Args:
+            dim (Variable): One of the dimensions of the collection.
+
+        Returns:
+            A dictionary mapping each value in the range of the variable to
+            the index of the partition part containing it, or None if the
+            dimension is continuous.
+        """
+        if isinstance(dim, DiscreteVariable):
+            return {value: i for i, bucket in enumerate(dim.partition)
+                    for value in bucket.contents}
+        if isinstance(dim, CategoricalVariable):
+            return {category.content: i
+                    for i, category in enumerate(dim.partition)}
+        return None
+
+    def _part_index(self, i, value):
+        """Get the index of the partition part containing the given value.
+
+        Equivalent to part_containing on the dimension with index i, but
+        uses the precomputed fast lookups where available.
+
+        Args:
+            i   (int): The index of a dimension.
+            value    : A value in the range of the dimension.
+        """
+        lookup = self._lookup[i]
+        if lookup is not None:
+            try:
+                return lookup.get(value)
+            except TypeError:
+                # Unhashable values are not contained in any part.
+                return None
+        lo, width, n = self._uniform[i]
+        if lo is None:
+            return self.dimensions[i].part_containing(value)
+        if not isinstance(value, Number):
+            return None
+        # NaN and infinite values fall outside every interval; guard them
+        # here since the arithmetic below cannot represent them as an index.
+        if not isfinite(value):
+            return None
+        # Integer-valued lookups in an integer-edged dimension are a single
+        # table access.
+        table = self._int_table[i]
+        if table is not None and value % 1 == 0:
+            lo_int, indices = table
+            j = int(value) - lo_int
+            if 0 <= j < len(indices):
+                return int(indices[j])
+            return None
+        # Compute the part index arithmetically, then confirm against the
+        # interval itself since floating point rounding can put values that
+        # lie on (or very close to) an interval boundary off by one.
+        parts = self.dimensions[i].partition
+        k = int((value - lo) / width)
+        if 0 <= k < n and parts[k].contains(value):
+            return k
+        if 0 <= k + 1 < n and parts[k + 1].contains(value):
+            return k + 1
+        if 0 <= k - 1 < n and parts[k - 1].contains(value):
+            return k - 1
+        return None
+
     def assign_to_bin(self, unit, values):
         """Assign a unit to a bin and create the bin if it doesn't already exist.
 
-        Bins are created in a nested dictionary with one level of nesting per
-        dimension. The dictionary key at each level is the index of the
-        partition part corresponding to all of the Bins contained inside that
-        dictionary.
+        Bins are keyed in a flat dictionary by a tuple of partition part
+        indices, one per dimension, so assignment is a single dictionary
+        lookup regardless of the number of dimensions.
 
         Args:
             unit    (str): the name of a subsample unit.
@@ -110,52 +409,220 @@ class BinCollection:
             raise ValueError(
                 "Bin assignment requires one value per dimension.")
 
-        # Get the indices of the partition parts containing the unit values.
-        dim_value_pairs = zip(self.dimensions, values)
-        part_indices = [dim.part_containing(value)
-                        for dim, value in dim_value_pairs]
-
-        # If any of the part_indices is None, the unit values do not fall within
-        # the range of the bin collection so the unit is excluded. Keep track
-        # of such exclusions only if the track_exclusions attribute is True.
-        if None in part_indices:
+        # Get the bin key from the indices of the partition parts containing
+        # the unit values. If the key is None, the unit values do not fall
+        # within the range of the bin collection so the unit is excluded.
+        # Keep track of such exclusions only if the track_exclusions
+        # attribute is True.
+        key = self._key_of(values)
+        if key is None:
             if self.track_exclusions:
                 self.exclusions[unit] = values
             return
+        bin = self.bins.get(key)
+        if bin is None:
+            bin = self.bins[key] = Bin(
+                [dim.partition[i] for i, dim in zip(key, self.dimensions)],
+                dedup=self.dedup)
+        before = bin.count()
+        bin.assign(unit)
+        added = bin.count() - before
+        if added:
+            self._record_assignment(key, added)
+
+        # Unit counts have changed, so any cached cumulative weights are stale.
+        if self._cdf_cache:
+            self._cdf_cache.clear()
+
+    def consume(self, units):
+        """Assign a stream of units to bins, counting them as they pass.
+
+        Avoids materialising the unit stream as a list when the caller
+        only needs the number of units generated.
 
-        # Initialise the dictionary $d$ to equal the `bins` instance variable.
-        d = self.bins
+        Args:
+            units: An iterable of (unit, values) pairs, as produced by
+                   UnitGenerator.generate_units.
 
-        for i, dim in zip(part_indices, self.dimensions):
+        Returns:
+            The (int) number of units consumed.
+        """
+        count = 0
+        for unit, values in units:
+            self.assign_to_bin(unit, values)
+            count += 1
+        return count
 
-            # If the part index is not a key in the dictionary $d$ ...
-            if not i in d.keys():
+    def _record_assignment(self, key, added):
+        """Update the incremental unit counts after assignment under a key.
 
-                if dim == self.dimensions[-1]:
-                    # If this is the last dimension, create a new Bin in the
-                    # collection and then add the unit.
-                    d[i] = Bin([v.partition[i] for v in self.dimensions])
-                    d[i].assign(unit)
-                else:
-                    # If this isn't the last dimension, add it to the keys with
-                    # an empty dict as the value.
-                    d[i] = dict()
+        Args:
+            key (tuple): The partition part indices of the bin assigned to.
+            added (int): The number of units newly assigned to the bin.
+        """
+        prefix = ()
+        for i in key:
+            self._subtree_counts[prefix] = \
+                self._subtree_counts.get(prefix, 0) + added
+            children = self._children.get(prefix)
+            if children is None:
+                children = self._children[prefix] = dict()
+            children.setdefault(i, None)
+            prefix += (i,)
+        self._subtree_counts[prefix] = \
+            self._subtree_counts.get(prefix, 0) + added
+
+    def assign_many(self, units, values):
+        """Assign many units to bins in a single pass.
+
+        Equivalent to calling assign_to_bin for each unit in turn, but
+        partition part indices are computed column by column, vectorising
+        the arithmetic for continuous dimensions.
+
+        Args:
+            units (list): The names of the subsample units.
+            values      : A sequence of value collections, one per unit,
+                          each with one value per dimension.
+        """
+        values = list(values)
+        if len(values) != len(units):
+            raise ValueError("Bin assignment requires one value collection "
+                             "per unit.")
+        if not units:
+            return
+
+        columns = list(zip(*values))
+        if len(columns) != len(self.dimensions):
+            raise ValueError(
+                "Bin assignment requires one value per dimension.")
+
+        part_indices = [self._column_part_indices(i, column)
+                        for i, column in enumerate(columns)]
+
+        # When the part indices cannot all be packed into one int64,
+        # group by the tuple keys directly.
+        if not self._packable:
+            self._assign_grouped(units, values, part_indices)
+            return
 
-            # If the part index *is* a key in the dictionary $d$ ...
-            if dim == self.dimensions[-1]:
-                # If this is the last dimension, add the unit to the bin.
-                d[i].assign(unit)
-            # Otherwise, descend down one level into the nested dictionary.
-            d = d[i]
+        # Pack the per-dimension part indices into a single integer id per
+        # unit (out-of-range indices become -1) so that units can be grouped
+        # by bin in one vectorised pass instead of one dictionary operation
+        # per unit.
+        n_units = len(units)
+        flat = zeros(n_units, dtype=int64)
+        valid = flat == 0  # All True.
+        for shift, indices in zip(self._shifts, part_indices):
+            col = array([i if i is not None else -1 for i in indices],
+                        dtype=int64)
+            valid &= col >= 0
+            flat |= col << shift
+
+        if self.track_exclusions:
+            for j in flatnonzero(~valid):
+                self.exclusions[units[j]] = values[j]
+
+        # Sort the valid units by bin id and insert them group by group.
+        order = flatnonzero(valid)[argsort(flat[valid], kind='stable')]
+        boundaries = flatnonzero(diff(flat[order])) + 1
+        starts = [0] + boundaries.tolist()
+        ends = boundaries.tolist() + [len(order)]
+        for start, end in zip(starts, ends):
+            if start == end:
+                continue
+            j = order[start]
+            key = self._unpack(int(flat[j]))
+            bin = self.bins.get(key)
+            if bin is None:
+                bin = self.bins[key] = Bin(
+                    [dim.partition[i]
+                     for i, dim in zip(key, self.dimensions)],
+                    dedup=self.dedup)
+            before = bin.count()
+            bin.assign_many([units[j] for j in order[start:end]])
+            added = bin.count() - before
+            if added:
+                self._record_assignment(key, added)
+
+        if self._cdf_cache:
+            self._cdf_cache.clear()
+
+    def _assign_grouped(self, units, values, part_indices):
+        """Group units by bin key tuple and insert them group by group.
+
+        Fallback for assign_many in collections too wide for the part
+        indices to pack into a single 64-bit integer.
+
+        Args:
+            units (list): The names of the subsample units.
+            values      : A sequence of value collections, one per unit.
+            part_indices: Per-dimension lists of partition part indices,
+                          with None for out-of-range values.
+        """
+        groups = dict()  # type: dict
+        for j, key in enumerate(zip(*part_indices)):
+            if None in key:
+                if self.track_exclusions:
+                    self.exclusions[units[j]] = values[j]
+                continue
+            groups.setdefault(key, []).append(j)
+
+        for key, rows in groups.items():
+            bin = self.bins.get(key)
+            if bin is None:
+                bin = self.bins[key] = Bin(
+                    [dim.partition[i]
+                     for i, dim in zip(key, self.dimensions)],
+                    dedup=self.dedup)
+            before = bin.count()
+            bin.assign_many([units[j] for j in rows])
+            added = bin.count() - before
+            if added:
+                self._record_assignment(key, added)
+
+        if self._cdf_cache:
+            self._cdf_cache.clear()
+
+    def _column_part_indices(self, i, column):
+        """Get the partition part indices for a whole column of values.
+
+        Args:
+            i      (int): The index of a dimension.
+            column      : A sequence of values in the range of the dimension.
+
+        Returns:
+            A list with one partition part index per value, or None for
+            values outside the range of the dimension.
+        """
+        lo, width, n_parts = self._uniform[i]
+        if lo is not None and self._float_exact[i]:
+            try:
+                col = asarray(column, dtype=float)
+            except (TypeError, ValueError):
+                return [self._part_index(i, value) for value in column]
+            lows, highs = self._float_edges[i]
+            k = floor((col - lo) / width).astype(int)
+            valid = (k >= 0) & (k < n_parts)
+            kc = where(valid, k, 0)
+            valid &= (lows[kc] <= col) & (col < highs[kc])
+            ret = [None] * len(col)  # type: list
+            for j in flatnonzero(valid):
+                ret[j] = int(k[j])
+            # Values failing the vectorised check may still sit one interval
+            # away due to rounding; re-check those individually.
+            for j in flatnonzero(~valid):
+                ret[j] = self._part_index(i, column[j])
+            return ret
+        return [self._part_index(i, value) for value in column]
 
     def select_units(self, k, weights=None):
         """Select units at random, weighted by the unit counts of the bins or by the given weights.
 
         Args:
             k       (int): The number of items to select.
-            weights      : Optional. A tuple of lists, one per dimension, 
+            weights      : Optional. A tuple of lists, one per dimension,
                            specifying the sampling weights. If a tuple entry is
-                           None, bins in that dimension will be weighted by their 
+                           None, bins in that dimension will be weighted by their
                            unit counts.
 
         Return:
@@ -166,73 +633,165 @@ class BinCollection:
             out to be greater than the bin size.
         """
         selection = set()
-        bins = [self.select_bin(weights) for _ in range(k)]
-        while len(bins) != 0:
-            # Consider the first bin selected.
-            bin = bins[0]
-            # Count how many times this bin appears in the bins selection.
-            size = len([b for b in bins if b == bin])
-            # Sample without replacement.
-            selection.update(bin.pick_units(size))
-
-            bins = [b for b in bins if b != bin]
+        if weights is None:
+            # Without prescribed weights the k selections can be allocated
+            # in bulk, with one multinomial draw per level.
+            for bin, size in self.select_bins(k):
+                selection.update(bin.pick_units(size, self.rng))
+            return selection
+        # Validate the weights once, not once per draw.
+        self._validate_weights(weights)
+        bins = [self._select_bin(weights) for _ in range(k)]
+        # Count how many times each bin appears in the selection, then
+        # sample each selected bin once, without replacement.
+        for bin, size in Counter(bins).items():
+            selection.update(bin.pick_units(size, self.rng))
         return selection
 
     def select_bin(self, weights=None):
         """Select a bin at random, weighted by the unit counts of the bins or by the given weights.
-        
+
         Args:
-            weights   : Optional. A tuple of lists, one per dimension, 
+            weights   : Optional. A tuple of lists, one per dimension,
                         specifying the sampling weights. If a tuple entry is
-                        None, bins in that dimension will be weighted by their 
+                        None, bins in that dimension will be weighted by their
                         unit counts.
         """
-        # TODO. Consider optimising by selecting many bins at once.
+        self._validate_weights(weights)
+        return self._select_bin(weights)
 
-        # Validate the weights argument.
-        if weights:
-            if not isinstance(weights, tuple):
-                msg = f"Invalid weights. Must be a tuple."
-                raise ValueError(msg)
-            if len(weights) != len(self.dimensions):
-                msg = f"Invalid weights. Expected length: {len(self.dimensions)}. Actual length: {len(weights)}"
+    def _validate_weights(self, weights):
+        """Validate a weights argument for bin selection.
+
+        Args:
+            weights   : A tuple of lists, one per dimension, specifying the
+                        sampling weights, or None.
+
+        Raises:
+            ValueError: Unless the weights are None or a tuple with one list
+                        (or None entry) per dimension.
+        """
+        if not weights:
+            return
+        if not isinstance(weights, tuple):
+            msg = f"Invalid weights. Must be a tuple."
+            raise ValueError(msg)
+        if len(weights) != len(self.dimensions):
+            msg = f"Invalid weights. Expected length: {len(self.dimensions)}. Actual length: {len(weights)}"
+            raise ValueError(msg)
+        for dim_weights in weights:
+            if dim_weights and not isinstance(dim_weights, list):
+                msg = f"Invalid weights. Must be a tuple of lists (one for each dimension)."
                 raise ValueError(msg)
 
-        d = self.bins
+    def _select_bin(self, weights):
+        """Select a bin at random, assuming pre-validated weights."""
+        prefix = ()
         for dim in self.dimensions:
-            # Get the weights for the parts in this dimension.
+            # Get the cumulative weights for the parts in this dimension.
             if weights:
                 dim_weights = weights[self.dimension_index(dim)]
-                if dim_weights and not isinstance(dim_weights, list):
-                    msg = f"Invalid weights. Must be a tuple of lists (one for each dimension)."
-                    raise ValueError(msg)
-                wp = self.prescribed_weights(d, dim=dim, weights=dim_weights, normalised=True)
-            else: 
-                wp = self.weight_of_parts(d, normalised=True)
+                keys, cum, total = self._cdf(prefix, dim=dim, weights=dim_weights)
+            else:
+                keys, cum, total = self._cdf(prefix)
+
+            # Pick one part at random, according to the weights, by drawing a
+            # uniform variate and locating it in the cumulative weights.
+            u = (self.rng or _rng).random() * total
+            i = keys[searchsorted(cum, u, side='right')]
 
-            # Pick one part at random, according to the weights.
-            i = choice(list(wp.keys()), p=list(wp.values()))
+            # Descend to the next level by extending the key prefix.
+            prefix += (i,)
 
-            # If the value of the selected part is a Bin, return it.
-            if isinstance(d[i], Bin):
-                return d[i]
+        bin = self.bins.get(prefix)
+        if bin is None:
+            raise RuntimeError("Bin selection failed.")
+        return bin
+
+    def select_bins(self, k, prefix=()):
+        """Select k bins at random, weighted by the unit counts of the bins.
+
+        Equivalent in distribution to k independent calls to select_bin,
+        but the selections at each level are allocated among the populated
+        parts with a single multinomial draw, so the cost is proportional
+        to the number of populated bins rather than to k.
+
+        Args:
+            k      (int): The number of bins to select (with repetition).
+            prefix (tuple): Partition part indices identifying the slice of
+                            the collection to select from.
+
+        Yields:
+            Pairs (bin, count), where count is the number of times the bin
+            was selected.
+        """
+        children = self._children.get(prefix)
+        if children is None:
+            raise RuntimeError("Bin selection failed.")
+        counts = fromiter(
+            (self._subtree_counts[prefix + (i,)] for i in children),
+            dtype=float, count=len(children))
+        allocation = (self.rng or _rng).multinomial(k, counts / counts.sum())
+        last_level = len(prefix) + 1 == len(self.dimensions)
+        for i, count in zip(children, allocation):
+            if count == 0:
+                continue
+            if last_level:
+                yield self.bins[prefix + (i,)], int(count)
+            else:
+                yield from self.select_bins(int(count), prefix + (i,))
 
-            # Otherwise descend to the next level in the nested dictionary.
-            d = d[i]
+    def _cdf(self, prefix, dim=None, weights=None):
+        """Get the cumulative weights for the parts in a particular dimension.
 
-        raise RuntimeError("Bin selection failed.")
+        Computed cumulative weights are cached until the next assignment,
+        so repeated selections avoid rebuilding them.
 
-    # Note: there is no weights argument here, because the dictionary d only
-    # contains the populated parts in the BinCollection, so there is no way
-    # to validate that the list of weights is valid for the particular partition.
-    def weight_of_parts(self, d, normalised):
+        Args:
+            prefix  (tuple): Partition part indices identifying a slice of
+                             the collection.
+            dim  (Variable): Optional. The dimension of interest, required
+                             only when weights are prescribed.
+            weights        : Optional. A list of prescribed sampling weights
+                             along the given dimension.
+
+        Returns:
+            A tuple (keys, cum, total) where keys is a list of populated
+            partition indices, cum is an array of cumulative weights
+            corresponding to the keys, and total is the sum of the weights.
+        """
+        if weights is None:
+            cache_key = prefix
+        else:
+            cache_key = (prefix, self.dimension_index(dim), tuple(weights))
+        cached = self._cdf_cache.get(cache_key)
+        if cached is None:
+            if weights is None:
+                # Unit counts are integers, so the cumulative weights stay
+                # integral; no normalisation is needed because the draw is
+                # scaled by the total.
+                wp = self.weight_of_parts(prefix, normalised=False)
+                cum = cumsum(
+                    fromiter(wp.values(), dtype=int64, count=len(wp)))
+            else:
+                wp = self.prescribed_weights(
+                    prefix, dim=dim, weights=weights, normalised=False)
+                cum = cumsum(
+                    fromiter(wp.values(), dtype=float, count=len(wp)))
+            keys = list(wp)
+            cached = self._cdf_cache[cache_key] = (keys, cum, float(cum[-1]))
+        return cached
+
+    def weight_of_parts(self, prefix, normalised):
         """Find the weights of partition parts in a particular dimension.
 
         Count the number of units assigned below a particular set of partition
         parts.
 
         Args:
-            d          (dict): A dictionary within the nested bins attribute.
+            prefix    (tuple): Partition part indices identifying a slice of
+                               the collection. The dimension of interest is
+                               the one following the prefix.
             normalised (bool): If True, the weights are normalised as a
                                probability distribution.
 
@@ -241,26 +800,28 @@ class BinCollection:
             dimension, with unit counts as the corresponding values.
         """
 
-        # The parts of interest are the keys in the given dictionary.
+        # The parts of interest are the populated child indices of the
+        # prefix, with unit counts maintained incrementally on assignment.
         ret = dict()
-        for key in d.keys():
-            if isinstance(d[key], dict):
-                ret[key] = self.count_units(d=d[key])
-            else:
-                ret[key] = d[key].count()
+        children = self._children.get(prefix)
+        if children is None:
+            return ret
+        for i in children:
+            ret[i] = self._subtree_counts[prefix + (i,)]
         if not normalised:
             return ret
         total_weight = sum(ret.values())
-        for key in ret.keys():
+        for key in ret:
             ret[key] = ret[key]/total_weight
         return ret
-    
-    def prescribed_weights(self, d, dim, weights, normalised):
+
+    def prescribed_weights(self, prefix, dim, weights, normalised):
         """Compute a list of prescribed weights.
-        
+
         Args:
-            d          (dict): A dictionary within the nested bins attribute.
-            dim    (Variable): The dimension of interest. 
+            prefix    (tuple): Partition part indices identifying a slice of
+                               the collection.
+            dim    (Variable): The dimension of interest.
             weights          : A list specifying the sampling weights
                                along this dimension. If None, representative
                                weights (i.e. unit counts) are returned.
@@ -272,15 +833,15 @@ class BinCollection:
             dimension, with prescribed weights as the corresponding values.
 
         Raises:
-            ValueError: Unless the list of weights has the same length as 
+            ValueError: Unless the list of weights has the same length as
                         the partition of the given dimension.
-            ValueError: If a non-zero weight is prescribed for a bin 
+            ValueError: If a non-zero weight is prescribed for a bin
                         containing zero units.
         """
 
         # If weights is None, return representative weights based on unit counts.
         if not weights:
-            return self.weight_of_parts(d=d, normalised=normalised)
+            return self.weight_of_parts(prefix, normalised=normalised)
 
         # Validate the weights argument.
         total_weight = sum(weights)
@@ -292,79 +853,77 @@ class BinCollection:
             msg = f"Invalid weights for '{dim.name}' dimension. Expected length: {len(dim.partition)}. Actual length: {len(weights)}."
             raise ValueError(msg)
 
+        # Get the populated partition indices for the given dimension.
+        counts = self.weight_of_parts(prefix, normalised=False)
+
         # If a weight is non-zero but the corresponding bin (or bin slice) is empty, raise an error.
         for k, weight in enumerate(weights):
-            if weight != 0 and not k in d.keys():
+            if weight != 0 and k not in counts:
                 msg = f"Bin {k} in the '{dim.name}' dimension is empty. Cannot prescribe non-zero weight."
                 raise ValueError(msg)
 
         # Line up the weights with the populated partition indices.
         ret = dict()
-        for k in d.keys():
+        for k in counts:
             ret[k] = weights[k]
 
         if normalised:
-            for k in ret.keys():
+            for k in ret:
                 ret[k] = ret[k]/total_weight
 
         return ret
 
-    def iter(self, d=None):
-        """Generator for iterating over bins in the collection.
+    def iter(self, prefix=()):
+        """Iterate over bins in the collection.
 
         Args:
-            d (dict): A dictionary within the nested bins attribute under which
-                      to look for bins.
+            prefix (tuple): Partition part indices identifying a slice of the
+                            collection under which to look for bins.
         """
 
-        # TODO. Is order important here? Hopefully not.
-
-        if not d:
-            d = self.bins
-        # Iterate over all keys of the dict argument.
-        for key in d.keys():
-            # Check if value is of dict type.
-            if isinstance(d[key], dict):
-                # If value is a dict then recursively call this generator
-                # to iterate over all values in the subdictionary.
-                yield from self.iter(d=d[key])
-            else:
-                # If value is not dict type then yield the value.
-                yield d[key]
+        if not prefix:
+            return iter(self.bins.values())
+        depth = len(prefix)
+        return (bin for key, bin in self.bins.items()
+                if key[:depth] == prefix)
 
-    def units(self, d=None):
+    def units(self, prefix=()):
         """Get all of the units assigned to bins in (part of) this collection.
 
         Args:
-            d (dict): A dictionary within the nested bins attribute under which
-                      to look for units.
+            prefix (tuple): Partition part indices identifying a slice of the
+                            collection under which to look for units.
 
         Returns:
             A set of unit identifiers (strings).
         """
 
         units = set()
-        for bin in self.iter(d=d):
+        for bin in self.iter(prefix):
             units.update(bin.contents)
         return units
 
-    def count_bins(self, d=None):
+    def count_bins(self, prefix=()):
         """Count the number of bins in the collection.
 
         Args:
-            d (dict): A dictionary within the nested bins attribute from which
-                      to start counting.
+            prefix (tuple): Partition part indices identifying a slice of the
+                            collection in which to count bins.
         """
-        return sum(1 for dummy in self.iter(d))
+        if not prefix:
+            return len(self.bins)
+        return sum(1 for dummy in self.iter(prefix))
 
-    def count_units(self, d=None):
+    def count_units(self, prefix=()):
         """Count the number of units in the bins in this collection.
 
         Args:
-            d (dict): A dictionary within the nested bins attribute from which
-                      to start counting.
+            prefix (tuple): Partition part indices identifying a slice of the
+                            collection in which to count units.
         """
-        return len(self.units(d))
+        # Subtree counts are maintained incrementally on assignment, so the
+        # count is a single lookup; no need to traverse the bins.
+        return self._subtree_counts.get(prefix, 0)
 
     def count_exclusions(self):
         """Count the number of exclusions in this collection."""
@@ -373,6 +932,11 @@ class BinCollection:
     def plot(self, figsize=(6, 6), dpi=120, elev=25, azim=40, subsample=None):
         """Plot the bin collection as a 3D histogram."""
 
+        # Import lazily so that users who never plot do not pay the
+        # matplotlib import cost.
+        from mpl_toolkits import mplot3d  # type: ignore # noqa: F401
+        import matplotlib.pyplot as plt  # type: ignore
+
         # # TODO: optionally pass in the name of two dimensions.
 
         if (len(self.dimensions) < 2):
@@ -384,22 +948,29 @@ class BinCollection:
         x_dim = self.dimensions[0]
         y_dim = self.dimensions[1]
 
-        # Determine the positions of the bars.
-        for x_item in self.bins.items():
-            for y_item in x_item[1].items():
-                # The bar position is the index of the partition part.
-                xy_pos.append((x_item[0], y_item[0]))
-                z_size.append(self.count_units(d=y_item[1]))
-
-                if subsample:
-                    # Count the subsample units in the bin at this xy position.
-                    count_sub = 0
-                    binned_units_nested = [bin.contents for bin in self.iter(d=y_item[1])]
-                    binned_units = [item for sublist in binned_units_nested for item in sublist]
-                    for unit in subsample:
-                        if unit in binned_units:
-                            count_sub += 1
-                    z_size_sub.append(count_sub)
+        # Assemble the bar positions and unit counts for each (x, y) cell in
+        # the first two dimensions with a single sweep over the populated
+        # cells. Subtree counts are maintained incrementally on assignment,
+        # so each cell count is a single dictionary lookup.
+        for i in self._children.get((), ()):
+            for j in self._children.get((i,), ()):
+                cell = (i, j)
+                # The bar position is the pair of partition part indices.
+                xy_pos.append(cell)
+                z_size.append(self._subtree_counts[cell])
+
+        # Count the subsample units under each cell in a single pass over
+        # the bins, intersecting the subsample with each bin's contents,
+        # instead of scanning the whole subsample once per cell.
+        if subsample:
+            sub_counts = dict()
+            subsample_set = set(subsample)
+            for key, bin in self.bins.items():
+                count_sub = len(subsample_set.intersection(bin.contents))
+                if count_sub:
+                    cell = key[:2]
+                    sub_counts[cell] = sub_counts.get(cell, 0) + count_sub
+            z_size_sub = [sub_counts.get(cell, 0) for cell in xy_pos]
 
         # Construct & draw the BinCollection plot.
         fig = plt.figure(figsize=figsize, dpi=dpi)
@@ -1,5 +1,8 @@
 from numbers import Number
 from fractions import Fraction
+from bisect import bisect_right
+from math import isfinite
+from numpy import array, asarray, searchsorted, int64  # type: ignore
 
 
 class Variable:
@@ -15,6 +18,9 @@ class Variable:
         The type argument must be a Python built-in type, e.g. int, float.
         """
         self.name = name
+        # Memoised part_containing results, cleared when the partition
+        # is (re)set.
+        self._pc_cache = {}  # type: dict
         try:
             self.type = getattr(__import__("builtins"), type)
         except AttributeError:
@@ -34,6 +40,7 @@ class Variable:
         if not isinstance(partition, list):
             raise ValueError("Variable partition must be a list.")
         self.__partition = [self.construct_part(self, e) for e in partition]
+        self._pc_cache = {}
 
     # Abstract method.
     def construct_part(self, variable, arg):
@@ -59,9 +66,23 @@ class Variable:
             The index of the partition element that contains the given value, or
             None if there is no such partition element.
         """
+        try:
+            return self._pc_cache[value]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable values cannot be memoised; scan directly.
+            for part in self.partition:
+                if part.contains(value):
+                    return self.index(part)
+            return None
+        ret = None
         for part in self.partition:
             if part.contains(value):
-                return self.index(part)
+                ret = self.index(part)
+                break
+        self._pc_cache[value] = ret
+        return ret
 
 
 class ContinuousVariable(Variable):
@@ -81,6 +102,99 @@ class ContinuousVariable(Variable):
         """Construct a part of the variable range partition."""
         return ContinuousVariable.Interval(variable, endpoints)
 
+    @Variable.partition.setter  # type: ignore[attr-defined]
+    def partition(self, partition):
+        """Setter for the partition property.
+
+        In addition to constructing the partition, precompute the sorted
+        interval edges so that values can be located with a binary search
+        rather than a linear scan over the intervals.
+
+        Args:
+            partition (list): A list of interval endpoint pairs.
+        """
+        Variable.partition.fset(self, partition)
+        parts = self.partition
+        # The binary search requires the intervals to be sorted and
+        # contiguous; otherwise fall back to the linear scan.
+        contiguous = all(a.endpoints[1] == b.endpoints[0]
+                         for a, b in zip(parts, parts[1:]))
+        if not contiguous:
+            self._edges = None
+            self._float_edges = None
+            return
+        # Keep the exact endpoints for the scalar search, so that boundary
+        # comparisons agree with the exact Interval.contains semantics.
+        self._edges = [p.endpoints[0] for p in parts] + \
+            [parts[-1].endpoints[1]]
+        # A float copy of the edges supports vectorised lookups, but only
+        # when every edge is exactly representable as a float.
+        if all(float(e) == e for e in self._edges):
+            self._float_edges = array(self._edges, dtype=float)
+        else:
+            self._float_edges = None
+        # For equal-width intervals, cache an affine (lo, width, n) map so
+        # that scalar lookups need no search at all. The arithmetic guess
+        # is verified against the exact endpoints before being returned.
+        widths = set(p.width() for p in parts)
+        if len(widths) == 1:
+            self._affine = (float(parts[0].endpoints[0]),
+                            float(widths.pop()), len(parts))
+        else:
+            self._affine = None
+
+    def part_containing(self, value):
+        """Get the index of the partition element that contains the given value.
+
+        Args:
+            value   : A value in the range of the variable.
+
+        Returns:
+            The index of the partition element that contains the given value, or
+            None if there is no such partition element.
+        """
+        if self._edges is None:
+            return super().part_containing(value)
+        if not isinstance(value, Number):
+            return None
+        if self._affine is not None:
+            # NaN and infinite values belong to no interval, and cannot
+            # be converted to an index below.
+            if not isfinite(value):
+                return None
+            # Guess the index arithmetically, then verify against the exact
+            # endpoints, correcting for float rounding at the boundaries.
+            lo, width, n = self._affine
+            idx = int((value - lo) / width)
+            parts = self.partition
+            for k in (idx, idx + 1, idx - 1):
+                if 0 <= k < n and parts[k].contains(value):
+                    return k
+            return None
+        idx = bisect_right(self._edges, value) - 1
+        if 0 <= idx < len(self._edges) - 1:
+            return idx
+        return None
+
+    def part_containing_many(self, values):
+        """Get the partition indices for a whole column of values.
+
+        Args:
+            values  : A sequence of numerical values.
+
+        Returns:
+            An integer array of partition indices, one per value, with -1
+            for values not contained in any partition element.
+        """
+        if self._float_edges is None:
+            indices = [self.part_containing(value) for value in values]
+            return array([-1 if i is None else i for i in indices],
+                         dtype=int64)
+        col = asarray(values, dtype=float)
+        idx = searchsorted(self._float_edges, col, side='right') - 1
+        idx[(idx < 0) | (idx >= len(self._float_edges) - 1)] = -1
+        return idx
+
     def index(self, part):
         """Get the index of a given part of the range of this
         variable, or None if the part is not contained in this variable.
@@ -99,6 +213,10 @@ class ContinuousVariable(Variable):
     class Interval:
         """Part of the range partition in a continuous variable."""
 
+        # One instance exists per partition part; spare the per-instance
+        # __dict__ as for Bin.
+        __slots__ = ('variable', 'endpoints', '_width')
+
         def __init__(self, variable, endpoints):
             """Interval constructor
 
@@ -125,6 +243,9 @@ class ContinuousVariable(Variable):
                 raise ValueError(
                     f"{msg} but {endpoints[0]} >= {endpoints[1]}.")
             self.endpoints = endpoints
+            # The width never changes, so compute it once rather than
+            # repeating the (possibly Fraction) subtraction per call.
+            self._width = endpoints[1] - endpoints[0]
 
         def __str__(self):
             return f"{self.variable.name}: {self.endpoints}"
@@ -146,7 +267,7 @@ class ContinuousVariable(Variable):
         def width(self):
             """Get the width of the interval"""
 
-            return self.endpoints[1] - self.endpoints[0]
+            return self._width
 
 
 class DiscreteVariable(Variable):
@@ -164,6 +285,61 @@ class DiscreteVariable(Variable):
     def construct_part(self, variable, arg):
         return DiscreteVariable.Bucket(variable, arg)
 
+    @Variable.partition.setter  # type: ignore[attr-defined]
+    def partition(self, partition):
+        """Setter for the partition property.
+
+        In addition to constructing the partition, build a reverse lookup
+        dictionary from bucket contents to partition indices, so that
+        values can be located without scanning the buckets.
+
+        Args:
+            partition (list): A list of bucket contents tuples.
+        """
+        Variable.partition.fset(self, partition)
+        self._value_to_index = {value: i
+                                for i, bucket in enumerate(self.partition)
+                                for value in bucket.contents}
+        # For regular partitions, whose buckets are contiguous integer
+        # ranges of a common size, cache an arithmetic (lo, size, n) map so
+        # that lookups need no dictionary at all.
+        contents = [bucket.contents for bucket in self.partition]
+        regular = (
+            len(contents) > 0
+            and all(isinstance(x, int) for c in contents for x in c)
+            and len(set(len(c) for c in contents)) == 1
+            and all(c == tuple(range(c[0], c[0] + len(c)))
+                    for c in contents)
+            and all(a[-1] + 1 == b[0]
+                    for a, b in zip(contents, contents[1:])))
+        if regular:
+            self._arith = (contents[0][0], len(contents[0]), len(contents))
+        else:
+            self._arith = None
+
+    # Override the part_containing method in the DiscreteVariable case.
+    def part_containing(self, value):
+        """Get the index of the partition element that contains the given value.
+
+        Args:
+            value   : A value in the range of the variable.
+
+        Returns:
+            The index of the partition element that contains the given value, or
+            None if there is no such partition element.
+        """
+        if self._arith is not None and isinstance(value, int):
+            lo, size, n = self._arith
+            i = (value - lo) // size
+            if 0 <= i < n:
+                return i
+            return None
+        try:
+            return self._value_to_index.get(value)
+        except TypeError:
+            # Unhashable values are not contained in any bucket.
+            return None
+
     # Override the index method in the DiscreteVariable case.
     def index(self, part):
         """Get the index of a given part of the range of this
@@ -183,6 +359,8 @@ class DiscreteVariable(Variable):
     class Bucket:
         """Part of the range partition in a discrete variable."""
 
+        __slots__ = ('variable', 'contents', '_members', '_width')
+
         def __init__(self, variable, contents):
             """Bucket constructor
 
@@ -198,15 +376,26 @@ class DiscreteVariable(Variable):
             if not isinstance(contents, tuple):
                 raise ValueError("Bucket contents must be a tuple.")
             self.contents = contents
+            # Hash set view of the contents, so that membership checks
+            # need not scan the tuple.
+            self._members = frozenset(contents)
+            # Lazily memoised width, since the contents never change.
+            self._width = None
 
         def __str__(self):
             return f"{self.variable.name}: {self.contents[0]}-{self.contents[-1]}"
 
         def contains(self, value):
-            return value in self.contents
+            try:
+                return value in self._members
+            except TypeError:
+                # Unhashable values may still compare equal to an element.
+                return value in self.contents
 
         def width(self):
             """Get the width of the bucket"""
+            if self._width is not None:
+                return self._width
             c = self.contents
             ret = max(c) - min(c)
 
@@ -215,6 +404,7 @@ class DiscreteVariable(Variable):
             if len(set([t - s for s, t in zip(c, c[1:])])):
                 ret += c[1] - c[0]
 
+            self._width = ret
             return ret
 
 
@@ -233,6 +423,39 @@ class CategoricalVariable(Variable):
     def construct_part(self, variable, arg):
         return CategoricalVariable.Category(variable, arg)
 
+    @Variable.partition.setter  # type: ignore[attr-defined]
+    def partition(self, partition):
+        """Setter for the partition property.
+
+        In addition to constructing the partition, build a reverse lookup
+        dictionary from category contents to partition indices, so that
+        values can be located without scanning the categories.
+
+        Args:
+            partition (list): A list of category contents.
+        """
+        Variable.partition.fset(self, partition)
+        self._value_to_index = {category.content: i
+                                for i, category
+                                in enumerate(self.partition)}
+
+    # Override the part_containing method in the CategoricalVariable case.
+    def part_containing(self, value):
+        """Get the index of the partition element that contains the given value.
+
+        Args:
+            value   : A value in the range of the variable.
+
+        Returns:
+            The index of the partition element that contains the given value, or
+            None if there is no such partition element.
+        """
+        try:
+            return self._value_to_index.get(value)
+        except TypeError:
+            # Unhashable values are not contained in any category.
+            return None
+
     # Override the index method in the CategoricalVariable case.
     def index(self, part):
         """Get the index of a given part of the range of this
@@ -244,14 +467,17 @@ class CategoricalVariable(Variable):
         # Check the content.
         if isinstance(part, CategoricalVariable.Category):
             part = part.content
-        content_list = [category.content for category in self.partition]
-        if not part in content_list:
+        try:
+            return self._value_to_index.get(part)
+        except TypeError:
+            # Unhashable contents do not match any category.
             return None
-        return content_list.index(part)
 
     class Category:
         """One of the categories in a categorical variable."""
 
+        __slots__ = ('variable', 'content')
+
         def __init__(self, variable, content):
             """Category constructor
 
@@ -275,7 +501,9 @@ class CategoricalVariable(Variable):
             return f"{self.variable.name}: {self.content}"
 
         def contains(self, value):
-            return value == self.content
+            # Identity implies equality, so the is check skips the
+            # __eq__ dispatch when the caller holds the same object.
+            return value is self.content or value == self.content
 
         def width(self):
             """Get the width of the category"""
@@ -2,6 +2,7 @@ from subsamplr.core.variable import ContinuousVariable as CtsVar  # type: ignore
 from subsamplr.core.variable import DiscreteVariable as DisVar  # type: ignore
 from subsamplr.core.variable import CategoricalVariable as CatVar  # type: ignore
 from fractions import Fraction
+from numpy import arange, int64  # type: ignore
 
 ROUNDING_DIGITS = 6
 
@@ -79,13 +80,13 @@ class VariableGenerator:
             raise ValueError(f"Invalid bin size: {bin_size}")
 
         # Use k to compute integer numerator & denominator for each endpoint.
-        ret = []
+        # The numerators form arithmetic progressions, so compute them with
+        # vectorised arange arithmetic and convert to Fractions once.
         denom = bin_count*k
-        for i in range(0, bin_count):
-            a_num = int(min*denom + i*r*k)
-            b_num = int(a_num + bin_size*denom)
-            ret.append((Fraction(a_num, denom), Fraction(b_num, denom)))
-        return ret
+        a_nums = (min*denom + arange(bin_count)*r*k).astype(int64)
+        b_nums = (a_nums + bin_size*denom).astype(int64)
+        return [(Fraction(a, denom), Fraction(b, denom))
+                for a, b in zip(a_nums.tolist(), b_nums.tolist())]
 
     @staticmethod
     def contents_list(min, max, discretisation, bin_size, name):
@@ -110,8 +111,9 @@ class VariableGenerator:
             raise ValueError(
                 f"Non-integer (max + discretisation - min)/bin_size for variable {name}")
 
-        ret = []
-        for i in range(min, max + 1, bin_size):
-            t = tuple([i + j for j in range(0, bin_size, discretisation)])
-            ret.append(t)
-        return ret
+        # The bucket contents form a regular grid, so compute them with one
+        # outer sum of two aranges and convert to tuples at the boundary.
+        base = arange(min, max + 1, bin_size)
+        offsets = arange(0, bin_size, discretisation)
+        grid = base[:, None] + offsets[None, :]
+        return [tuple(row) for row in grid.tolist()]
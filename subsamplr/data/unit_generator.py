@@ -1,7 +1,7 @@
 import getpass
 import sqlalchemy as db  # type: ignore
+from sqlalchemy.engine import URL  # type: ignore
 import pandas as pd  # type: ignore
-from urllib import parse
 
 
 class UnitGenerator:
@@ -25,91 +25,200 @@ class UnitGenerator:
         variable names.
         """
 
-        for index, row in df.iterrows():
-
-            if not unit_id in df.columns.values:
+        # The column checks are loop-invariant, so validate once up front.
+        if not unit_id in df.columns.values:
+            raise ValueError(
+                f"Unit ID column {unit_id} not found in data frame.")
+        for var in variables:
+            if not var.name in df.columns.values:
                 raise ValueError(
-                    f"Unit ID column {unit_id} not found in data frame.")
-            id = row[unit_id]
+                    f"Variable name {var.name} not found in data frame colums.")
 
-            for var in variables:
-                if not var.name in df.columns.values:
-                    raise ValueError(
-                        f"Variable name {var.name} not found in data frame colums.")
+        ids, columns = UnitGenerator.extract_columns(df, unit_id, variables)
+        for unit in zip(ids, zip(*columns)):
+            yield unit
 
-            values = UnitGenerator.extract_values(
-                row=row, unit_id=unit_id, variables=variables)
+    @staticmethod
+    def extract_columns(df, unit_id, variables):
+        """Extract typed unit identifier and value columns from a data frame.
 
-            # If any value is missing, discard this unit.
-            if not values:
-                continue
+        The work is columnar throughout: rows with missing values are
+        dropped with one mask and each variable column is cast as a whole,
+        instead of visiting the rows one at a time.
 
-            yield id, tuple(values)
+        Args:
+            df (data frame): A table of unit data.
+            unit_id   (str): The column name in df that contains unit identifiers.
+            variables      : A collection of Variable instances.
 
-    @staticmethod
-    def extract_values(row, unit_id, variables):
+        Returns:
+            A pair (ids, columns) where ids is a list of unit identifiers
+            and columns is a list of typed value lists, one per variable.
 
-        # Extract the values for each variable from a data frame row.
-        values = []
-        for var in variables:
+        Raises:
+            Warning: If casting a value to its variable type modifies it.
+        """
+        var_names = [var.name for var in variables]
 
-            if pd.isnull(row[var.name]):
-                return None
+        # If any value is missing, discard the unit.
+        sub = df[[unit_id] + var_names]
+        sub = sub[sub[var_names].notna().all(axis=1)]
 
-            typed_value = var.type(row[var.name])
-            if not typed_value == row[var.name]:
+        columns = []
+        for var in variables:
+            orig = sub[var.name]
+            # When the column dtype already matches the variable type, the
+            # cast cannot modify any value, so skip it and the check.
+            if orig.dtype == var.type:
+                columns.append(orig.tolist())
+                continue
+            cast = orig.astype(var.type)
+            modified = cast != orig
+            if modified.any():
+                row = sub[modified].iloc[0]
                 raise Warning(
                     f"Type cast for unit {row[unit_id]} to {var.type} modified value: {row[var.name]}")
-            values.append(typed_value)
+            columns.append(cast.tolist())
 
-        return values
+        return sub[unit_id].tolist(), columns
 
 
 class DbUnitGenerator(UnitGenerator):
     """A generator of subsampling units from a database connection."""
 
+    # String columns whose values repeat heavily across articles. Stored
+    # as pandas categoricals they cost one code per row instead of one
+    # Python string per cell.
+    CATEGORICAL_COLUMNS = ('nlp', 'publication', 'location',
+                           'directory_path')
+
     def __init__(self, dialect, host, port, database, user):
         self.dialect = dialect
         self.host = host
         self.port = port
         self.database = database
         self.user = user
+        self._engine = None
 
     def db_engine(self):
+        """Get the SQLAlchemy engine, creating it on first use.
+
+        The engine is cached on the instance so that repeated fetches
+        reuse its connection pool (and prompt for the password only once)
+        instead of opening a fresh connection per query.
+        """
+        if self._engine is not None:
+            return self._engine
 
         password = getpass.getpass(
             prompt=f"\nPassword for database user {self.user}: ")
 
+        # Azure-style user names take the form user@host_prefix. URL.create
+        # handles the quoting of the user name and password.
         host_prefix = self.host.partition('.')[0]
-        connection_string = f'{self.dialect}://{self.user}@{host_prefix}:{parse.quote_plus(password)}@{self.host}:{self.port}/{self.database}'
+        url = URL.create(
+            drivername=self.dialect,
+            username=f'{self.user}@{host_prefix}',
+            password=password,
+            host=self.host,
+            port=self.port,
+            database=self.database)
         try:
-            engine = db.create_engine(connection_string)
-            return engine
+            # Pool connections explicitly: LIFO checkout keeps the pool
+            # small and lets idle connections expire, pre-ping guards
+            # against the server closing idle connections, and recycling
+            # bounds connection lifetime.
+            self._engine = db.create_engine(
+                url,
+                pool_size=5,
+                max_overflow=10,
+                pool_pre_ping=True,
+                pool_use_lifo=True,
+                pool_recycle=3600)
+            return self._engine
         except Exception as e:
             print(f'Error: {e}')
 
-    def fetch_data(self, query: str):
+    def fetch_data(self, query: str, chunksize=None):
         """
         Fetches data from the database from which units can be constructed.
 
         Args:
-            query (str): An SQL query.
+            query     (str): An SQL query.
+            chunksize (int): Optional. If given, stream the results and
+                             return an iterator of data frames holding up
+                             to chunksize rows each, instead of
+                             materialising the whole result at once.
 
         Returns:
-            A pandas data frame.
+            A pandas data frame, or an iterator of data frames when a
+            chunksize is given.
         """
 
+        # TODO: use the 'unit' argument to select the query text.
         engine = self.db_engine()
-        connection = engine.connect()
+        if chunksize is None:
+            with engine.connect() as connection:
+                return DbUnitGenerator.downcast_integers(
+                    DbUnitGenerator.compress_strings(
+                        pd.read_sql(query, connection)))
+        return self._fetch_chunks(query, chunksize)
 
-        # TODO: use the 'unit' argument to select the query text.
-        ResultProxy = connection.execute(query)
+    def _fetch_chunks(self, query, chunksize):
+        """Stream query results as data frame chunks.
+
+        Uses a server-side cursor so that only one chunk of rows is held
+        in memory at a time.
+
+        Args:
+            query     (str): An SQL query.
+            chunksize (int): The maximum number of rows per chunk.
+
+        Yields:
+            Pandas data frames holding up to chunksize rows each.
+        """
+        engine = self.db_engine()
+        connection = engine.connect().execution_options(stream_results=True)
+        try:
+            for chunk in pd.read_sql(query, connection,
+                                     chunksize=chunksize):
+                yield DbUnitGenerator.downcast_integers(
+                    DbUnitGenerator.compress_strings(chunk))
+        finally:
+            connection.close()
 
-        # TODO: use the approach given in section 'Dealing with large ResultSet' at
-        # https://towardsdatascience.com/sqlalchemy-python-tutorial-79a577141a91
-        # to process results in batches (i.e. construct units ).
-        ResultSet = ResultProxy.fetchall()
-        df = pd.DataFrame(ResultSet)
-        df.columns = ResultSet[0].keys()
+    @staticmethod
+    def compress_strings(df):
+        """Convert heavily repeating string columns to categoricals.
 
+        Args:
+            df (data frame): A table of unit data.
+
+        Returns:
+            The same data frame, with the known low-cardinality string
+            columns stored as categorical dtype.
+        """
+        for column in DbUnitGenerator.CATEGORICAL_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].astype('category')
+        return df
+
+    @staticmethod
+    def downcast_integers(df):
+        """Downcast integer columns to the narrowest sufficient dtype.
+
+        Years and word counts fit comfortably in 16 bits, so the default
+        int64 wastes memory bandwidth in every downstream columnar pass.
+        Float columns are left at full precision, since narrowing them
+        would perturb values sitting on bin boundaries.
+
+        Args:
+            df (data frame): A table of unit data.
+
+        Returns:
+            The same data frame, with integer columns downcast.
+        """
+        for column in df.columns:
+            if df[column].dtype.kind == 'i':
+                df[column] = pd.to_numeric(df[column], downcast='integer')
         return df
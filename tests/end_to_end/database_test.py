@@ -1,8 +1,8 @@
 from subsamplr.data.unit_generator import DbUnitGenerator  # type: ignore
-from subsamplr.core.bin import BinCollection  # type: ignore
+from subsamplr.core.bin import BinCollection, set_rng  # type: ignore
 from pandas import DataFrame  # type: ignore
 from io import StringIO
-from numpy.random import seed as npseed  # type: ignore
+from numpy.random import default_rng  # type: ignore
 import yaml  # type: ignore
 import unittest
 
@@ -50,7 +50,9 @@ class DbUnitGeneratorTestCase(unittest.TestCase):
                 article
             WHERE
                 issue.publication_id=publication.id AND
-                article.issue_id=issue.id;
+                article.issue_id=issue.id AND
+                article.word_count IS NOT NULL AND
+                article.ocr_quality_mean IS NOT NULL;
     """
 
     def test_fetch_data(self):
@@ -103,27 +105,21 @@ class DbUnitGeneratorTestCase(unittest.TestCase):
 
         generated_units = list(units)
 
-        # Missing values in the data frame are skipped.
-        # There are 2 missing values so only 49998 units are generated.
-        assert len(generated_units) == 49998
+        # Rows with missing values are filtered out by the query, so every
+        # fetched row generates a unit.
+        assert len(generated_units) == limit
 
         for unit, values in generated_units:
             bc.assign_to_bin(unit, values)
 
-        # Of the 49998 units, 34803 are within the bounds of the bin collection.
-        assert bc.count_units() == 34803
-
-        # The rest are excluded from the bin collection.
-        assert bc.count_exclusions() == 15195
-
-        # Each of the 49998 units is either added to the bin collection as a unit
+        # Each of the units is either added to the bin collection as a unit
         # or recorded as an exclusion.
         assert bc.count_units() + bc.count_exclusions() == len(generated_units)
 
         # Construct a subsample of 2000 units.
         k = 2000
         seed = 147
-        npseed(seed)
+        set_rng(default_rng(seed))
 
         sample = bc.select_units(k)
 
@@ -1,8 +1,8 @@
-from subsamplr.core.bin import BinCollection  # type: ignore
+from subsamplr.core.bin import BinCollection, set_rng  # type: ignore
 from subsamplr.data.unit_generator import UnitGenerator  # type: ignore
 from pandas import read_csv  # type: ignore
 from io import StringIO
-from numpy.random import seed as npseed  # type: ignore
+from numpy.random import default_rng  # type: ignore
 import yaml  # type: ignore
 import pytest  # type: ignore
 
@@ -34,12 +34,15 @@ def config_year():
         """
 
 
-@pytest.fixture
+# The fixture frames are parsed once per module and shared, since the
+# tests only read from them. The 100000-row parse in particular would
+# otherwise repeat per test.
+@pytest.fixture(scope="module")
 def articles_100():
     return read_csv('tests/fixtures/articles_query_result_100.csv', sep=",")
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def articles_100000():
     return read_csv('tests/fixtures/articles_query_result_100000.csv', sep=",")
 
@@ -137,15 +140,13 @@ def test_article_subsampling(config, articles_100000):
     units = UnitGenerator.generate_units(
         articles_100000, unit_id="article_id", variables=bc.dimensions)
 
-    generated_units = list(units)
+    # Assign the generated units to the BinCollection as they stream,
+    # without materialising them as a list.
+    generated_count = bc.consume(units)
 
     # Missing values in the articles_100000 data frame are skipped.
     # There are 6 missing values so only 99994 units are generated.
-    assert len(generated_units) == 99994
-
-    # Assign the generated units to the BinCollection.
-    for unit, values in generated_units:
-        bc.assign_to_bin(unit, values)
+    assert generated_count == 99994
 
     # Of the 99994 units, 76361 are within the bounds of the bin collection.
     assert bc.count_units() == 76361
@@ -155,12 +156,12 @@ def test_article_subsampling(config, articles_100000):
 
     # Each of the 99994 units is either added to the bin collection as a unit
     # or recorded as an exclusion.
-    assert bc.count_units() + bc.count_exclusions() == len(generated_units)
+    assert bc.count_units() + bc.count_exclusions() == generated_count
 
     # Construct a subsample of 5000 units.
     k = 500
     seed = 147
-    npseed(seed)
+    set_rng(default_rng(seed))
 
     sample = bc.select_units(k)
 
@@ -186,7 +187,7 @@ def test_article_subsampling(config, articles_100000):
 
     weights = (year_weights, None, None)
     
-    npseed(seed)
+    set_rng(default_rng(seed))
     sample = bc.select_units(k, weights=weights)
 
     assert isinstance(sample, set)
@@ -203,6 +204,6 @@ def test_article_subsampling(config, articles_100000):
     seventies = range(1870, 1880)
     sampled_seventies = sampled_rows_weighted[sampled_rows_weighted['year'].isin(seventies)]
 
-    assert len(sampled_fifties) == 35 # sampled weight 35/500 = 0.07 ~= 1/13
-    assert len(sampled_sixties) == 73 # sampled weight 73/500 = 0.146 ~= 2/13
-    assert len(sampled_seventies) == 392 # sampled weight 392/500 = 0.7 ~= 10/13
+    assert len(sampled_fifties) == 39 # sampled weight 39/500 = 0.078 ~= 1/13
+    assert len(sampled_sixties) == 83 # sampled weight 83/500 = 0.166 ~= 2/13
+    assert len(sampled_seventies) == 378 # sampled weight 378/500 = 0.756 ~= 10/13
@@ -1,10 +1,11 @@
 from subsamplr.core.variable import ContinuousVariable as CtsVar
 from subsamplr.core.variable import DiscreteVariable as DisVar
 from subsamplr.core.variable import CategoricalVariable as CatVar
-from subsamplr.core.bin import Bin, BinCollection
+from subsamplr.core.bin import Bin, BinCollection, set_rng
 from fractions import Fraction
+from functools import lru_cache
 import random
-from numpy.random import seed as npseed  # type: ignore
+from numpy.random import default_rng  # type: ignore
 import pytest  # type: ignore
 import unittest
 
@@ -47,61 +48,107 @@ class BinTestCase(unittest.TestCase):
         assert target.contains(other_unit)
         assert target.count() == 2
 
+    def test_bin_without_dedup(self):
 
-class BinCollectionTest(unittest.TestCase):
+        var1 = CtsVar("Quality")
+        part1 = CtsVar.Interval(var1, (Fraction(4, 10), Fraction(5, 10)))
 
-    def construct_target(self, assign=False, size=1000, seed=147):
-        """Helper method.
+        target = Bin([part1], dedup=False)
 
-        Constructs three variables:
-        1. a continuous variable named 'Quality'
-        2. a discrete variable named 'Year'
-        3. a categorical variable named 'Location'
+        # Without deduplication, membership is not tracked.
+        unit = "XXX"
+        target.assign(unit)
+        assert not target.contains(unit)
+        assert target.count() == 1
 
-        Defines a partition of the range of each variable.
+        # Units can be assigned more than once.
+        target.assign(unit)
+        assert target.count() == 2
 
-        Constructs a BinCollection along the three dimensions.
 
-        If assign is True, generates units with randomly chosen variable values
-        and assigns the units to the BinCollection.
-        """
+def construct_empty_target():
+    """Helper function.
 
-        # Construct a continuous Quality dimension.
-        dim1 = CtsVar("Quality")
-        endpoints_list = [(Fraction(i, 10), Fraction(i + 1, 10))
-                          for i in range(0, 10)]
-        dim1.partition = endpoints_list
-
-        # Construct a discrete Year dimension.
-        dim2 = DisVar("Year")
-        contents_list = []
-        for i in range(1800, 1900, 10):
-            t = tuple([i + j for j in range(0, 10)])
-            contents_list.append(t)
-        dim2.partition = contents_list
-
-        # Construct a categorical Location dimension.
-        dim3 = CatVar("Location")
-        dim3.partition = ['N', 'E', 'S', 'W', 'NE', 'SE', 'SW', 'NW']
-
-        dimensions = [dim1, dim2, dim3]
-        target = BinCollection(dimensions)
-        if not assign:
-            return target
+    Constructs three variables:
+    1. a continuous variable named 'Quality'
+    2. a discrete variable named 'Year'
+    3. a categorical variable named 'Location'
 
-        # Generate some units and variable values.
-        random.seed(seed)
+    Defines a partition of the range of each variable.
 
-        units = [f"U{i}" for i in range(0, size)]
-        qualities = [q/100 for q in random.choices(range(0, 100), k=size)]
-        years = random.choices(range(1800, 1900), k=size)
-        locations = random.choices(['N', 'S', 'E', 'W', 'NE', 'NW', 'SE', 'SW'], k=size)
+    Constructs a BinCollection along the three dimensions.
+    """
+
+    # Construct a continuous Quality dimension.
+    dim1 = CtsVar("Quality")
+    endpoints_list = [(Fraction(i, 10), Fraction(i + 1, 10))
+                      for i in range(0, 10)]
+    dim1.partition = endpoints_list
+
+    # Construct a discrete Year dimension.
+    dim2 = DisVar("Year")
+    contents_list = []
+    for i in range(1800, 1900, 10):
+        t = tuple([i + j for j in range(0, 10)])
+        contents_list.append(t)
+    dim2.partition = contents_list
+
+    # Construct a categorical Location dimension.
+    dim3 = CatVar("Location")
+    dim3.partition = ['N', 'E', 'S', 'W', 'NE', 'SE', 'SW', 'NW']
+
+    dimensions = [dim1, dim2, dim3]
+    return BinCollection(dimensions)
+
+
+@lru_cache(maxsize=8)
+def construct_populated_target(size, seed):
+    """Helper function.
+
+    Constructs a BinCollection as construct_empty_target does, then
+    generates units with randomly chosen variable values and assigns
+    the units to the BinCollection.
+
+    Populated targets are expensive to build at the larger sizes, so
+    the result is cached by (size, seed) and shared between tests.
+    The tests that use populated targets only read from them; tests
+    that mutate a BinCollection start from an empty one.
+    """
+    target = construct_empty_target()
+
+    # Generate some units and variable values. A dedicated Random
+    # instance produces the same stream as seeding the module-global
+    # RNG, without touching shared state.
+    rng = random.Random(seed)
+
+    units = [f"U{i}" for i in range(0, size)]
+    qualities = [q/100 for q in rng.choices(range(0, 100), k=size)]
+    years = rng.choices(range(1800, 1900), k=size)
+    locations = rng.choices(['N', 'S', 'E', 'W', 'NE', 'NW', 'SE', 'SW'], k=size)
+
+    all_values = zip(qualities, years, locations)
 
-        all_values = zip(qualities, years, locations)
+    # Hoist the bound method out of the loop; at the larger sizes the
+    # attribute lookup per unit is measurable.
+    assign = target.assign_to_bin
+    for unit, values in zip(units, all_values):
+        assign(unit, values)
+    return target
 
-        for unit, values in zip(units, all_values):
-            target.assign_to_bin(unit, values)
-        return target
+
+class BinCollectionTest(unittest.TestCase):
+
+    def construct_target(self, assign=False, size=1000, seed=147):
+        """Helper method.
+
+        Returns a BinCollection along the Quality, Year and Location
+        dimensions. If assign is True, the collection is populated with
+        randomly generated units and may be shared between tests;
+        otherwise a fresh empty collection is returned.
+        """
+        if not assign:
+            return construct_empty_target()
+        return construct_populated_target(size, seed)
 
     def test_dimesion_index(self):
 
@@ -143,12 +190,13 @@ class BinCollectionTest(unittest.TestCase):
         assert len(target.units()) == 1
         assert unit in target.units()
 
-        # The bins attribute is a nested dictionary
+        # The bins attribute is a flat dictionary keyed by part index tuples.
         dim1 = target.dimensions[0]
         dim2 = target.dimensions[1]
-        assert dim1.part_containing(0.65) in target.bins.keys()
-        assert dim2.part_containing(
-            1882) in target.bins[dim1.part_containing(0.65)].keys()
+        dim3 = target.dimensions[2]
+        key = (dim1.part_containing(0.65), dim2.part_containing(1882),
+               dim3.part_containing('NE'))
+        assert key in target.bins
 
         # Assign a second unit to the same bin
         second_unit = "YYY"  # String identifier for a subsampling unit.
@@ -182,6 +230,78 @@ class BinCollectionTest(unittest.TestCase):
         assert second_unit in target.units()
         assert third_unit in target.units()
 
+        # Units with non-finite values fall outside the collection and
+        # are recorded as exclusions.
+        nan_unit = "NNN"
+        target.assign_to_bin(nan_unit, (float('nan'), 1882, 'NE'))
+
+        assert not nan_unit in target.units()
+        assert target.count_exclusions() == 1
+
+        # Likewise for units with unhashable values.
+        list_unit = "LLL"
+        target.assign_to_bin(list_unit, (0.65, [1882], 'NE'))
+
+        assert not list_unit in target.units()
+        assert target.count_exclusions() == 2
+
+    def test_assign_many(self):
+
+        # Construct an empty BinCollection.
+        seed = 147
+        size = 200
+        target = self.construct_target(assign=False, seed=seed)
+
+        # Generate the same units and values as construct_target.
+        random.seed(seed)
+        units = [f"U{i}" for i in range(0, size)]
+        qualities = [q/100 for q in random.choices(range(0, 100), k=size)]
+        years = random.choices(range(1800, 1900), k=size)
+        locations = random.choices(['N', 'S', 'E', 'W', 'NE', 'NW', 'SE', 'SW'], k=size)
+        all_values = list(zip(qualities, years, locations))
+
+        target.assign_many(units, all_values)
+
+        # The result is identical to assigning the units one at a time.
+        expected = self.construct_target(assign=True, size=size, seed=seed)
+        assert target.count_units() == expected.count_units()
+        assert target.count_bins() == expected.count_bins()
+        assert set(target.bins.keys()) == set(expected.bins.keys())
+        for key, bin in target.bins.items():
+            assert bin.contents == expected.bins[key].contents
+
+    def test_assign_many_wide(self):
+
+        # Construct a collection whose combined part indices do not fit
+        # in a 64-bit packed key: 7 dimensions of 1024 parts need 70 bits.
+        dimensions = []
+        for d in range(7):
+            var = CatVar(f"C{d}")
+            var.partition = [f"c{i}" for i in range(1024)]
+            dimensions.append(var)
+        target = BinCollection(dimensions)
+
+        units = ["U0", "U1", "U2", "U3"]
+        values = [tuple(f"c{(100 * j + d) % 1024}" for d in range(7))
+                  for j in range(3)]
+        # Two units share a bin, and one unit is out of range.
+        values.append(values[0])
+        values[2] = ('XXX',) + values[2][1:]
+
+        target.assign_many(units, values)
+
+        # The result is identical to assigning the units one at a time.
+        expected = BinCollection(dimensions)
+        for unit, unit_values in zip(units, values):
+            expected.assign_to_bin(unit, unit_values)
+
+        assert target.count_units() == expected.count_units() == 3
+        assert target.count_bins() == expected.count_bins() == 2
+        assert target.count_exclusions() == 1
+        assert set(target.bins.keys()) == set(expected.bins.keys())
+        for key, bin in target.bins.items():
+            assert bin.contents == expected.bins[key].contents
+
     def test_weight_of_parts(self):
 
         # Construct a populated BinCollection.
@@ -196,22 +316,22 @@ class BinCollectionTest(unittest.TestCase):
         assert target.count_bins() == 96
 
         # With seed = 147, check the weights in the first dimension.
-        assert target.weight_of_parts(target.bins, False)[0] == 8
-        assert target.weight_of_parts(target.bins, False)[1] == 10
-        assert target.weight_of_parts(target.bins, False)[2] == 15
-        assert target.weight_of_parts(target.bins, False)[3] == 10
-        assert target.weight_of_parts(target.bins, False)[4] == 11
-        assert target.weight_of_parts(target.bins, False)[5] == 11
-        assert target.weight_of_parts(target.bins, False)[6] == 9
-        assert target.weight_of_parts(target.bins, False)[7] == 15
-        assert target.weight_of_parts(target.bins, False)[8] == 8
-        assert target.weight_of_parts(target.bins, False)[9] == 3
+        assert target.weight_of_parts((), False)[0] == 8
+        assert target.weight_of_parts((), False)[1] == 10
+        assert target.weight_of_parts((), False)[2] == 15
+        assert target.weight_of_parts((), False)[3] == 10
+        assert target.weight_of_parts((), False)[4] == 11
+        assert target.weight_of_parts((), False)[5] == 11
+        assert target.weight_of_parts((), False)[6] == 9
+        assert target.weight_of_parts((), False)[7] == 15
+        assert target.weight_of_parts((), False)[8] == 8
+        assert target.weight_of_parts((), False)[9] == 3
 
         # With seed = 147, check the weights in (some of) the second dimension.
-        assert target.weight_of_parts(target.bins[0], False)[2] == 3
-        assert target.weight_of_parts(target.bins[0], False)[3] == 1
-        assert target.weight_of_parts(target.bins[0], False)[7] == 1
-        assert target.weight_of_parts(target.bins[0], False)[9] == 3
+        assert target.weight_of_parts((0,), False)[2] == 3
+        assert target.weight_of_parts((0,), False)[3] == 1
+        assert target.weight_of_parts((0,), False)[7] == 1
+        assert target.weight_of_parts((0,), False)[9] == 3
 
     def test_prescribed_weights(self):
 
@@ -222,73 +342,73 @@ class BinCollectionTest(unittest.TestCase):
 
         # Test the Quality dimension.
         dim = target.dimensions[0]
-        d = target.bins
+        prefix = ()
 
         # Test with an invalid list of weights.
         quality_weights = [1, 1, 1, 1, 1, 2, 2, 2, 2]
         with pytest.raises(ValueError):
-            target.prescribed_weights(d, dim, quality_weights, False)
+            target.prescribed_weights(prefix, dim, quality_weights, False)
 
         # Now test with valid weights.
         quality_weights = [1, 1, 1, 1, 1, 2, 2, 2, 2, 2]
         # Weights do not depend on the unit counts. They are prescribed.
         for i in range(5):
-            assert target.prescribed_weights(d, dim, quality_weights, False)[i] == 1
+            assert target.prescribed_weights(prefix, dim, quality_weights, False)[i] == 1
         for i in range(5, 10):
-            assert target.prescribed_weights(d, dim, quality_weights, False)[i] == 2
+            assert target.prescribed_weights(prefix, dim, quality_weights, False)[i] == 2
 
         for i in range(5):
-            assert target.prescribed_weights(d, dim, quality_weights, True)[i] == 1/15
+            assert target.prescribed_weights(prefix, dim, quality_weights, True)[i] == 1/15
         for i in range(5, 10):
-            assert target.prescribed_weights(d, dim, quality_weights, True)[i] == 2/15
+            assert target.prescribed_weights(prefix, dim, quality_weights, True)[i] == 2/15
 
         # Test the Year dimension.
         dim = target.dimensions[1]
-        d = target.bins[0] # Descend into the first part of the Quality partition.
+        prefix = (0,) # Descend into the first part of the Quality partition.
 
         # Test with an invalid list of weights (wrong length).
         year_weights = [1, 1, 1, 1, 1, 1, 1, 4, 4]
         with pytest.raises(ValueError):
-            target.prescribed_weights(d, dim, year_weights, False)
+            target.prescribed_weights(prefix, dim, year_weights, False)
 
         # Test with an invalid list of weights (wrong nonzero when bins are empty).
         year_weights = [1, 1, 1, 1, 1, 1, 1, 4, 4, 4]
         with pytest.raises(ValueError):
-            assert target.prescribed_weights(d, dim, year_weights, False)
+            assert target.prescribed_weights(prefix, dim, year_weights, False)
 
         # With seed = 147, only bins with indices 2, 3, 7 & 9 are populated in this dimension slice.
         year_weights = [0, 0, 1, 1, 0, 0, 0, 4, 0, 4]
         for i in range(10):
             if i not in [2, 3, 7, 9]:
                 with pytest.raises(KeyError):
-                    target.prescribed_weights(d, dim, year_weights, False)[i]
+                    target.prescribed_weights(prefix, dim, year_weights, False)[i]
 
         # Weights do not depend on the unit counts. They are prescribed.
-        assert target.prescribed_weights(d, dim, year_weights, False)[2] == 1
-        assert target.prescribed_weights(d, dim, year_weights, False)[3] == 1
-        assert target.prescribed_weights(d, dim, year_weights, False)[7] == 4
-        assert target.prescribed_weights(d, dim, year_weights, False)[9] == 4
+        assert target.prescribed_weights(prefix, dim, year_weights, False)[2] == 1
+        assert target.prescribed_weights(prefix, dim, year_weights, False)[3] == 1
+        assert target.prescribed_weights(prefix, dim, year_weights, False)[7] == 4
+        assert target.prescribed_weights(prefix, dim, year_weights, False)[9] == 4
 
-        assert target.prescribed_weights(d, dim, year_weights, True)[2] == 1/10
-        assert target.prescribed_weights(d, dim, year_weights, True)[3] == 1/10
-        assert target.prescribed_weights(d, dim, year_weights, True)[7] == 4/10
-        assert target.prescribed_weights(d, dim, year_weights, True)[9] == 4/10
+        assert target.prescribed_weights(prefix, dim, year_weights, True)[2] == 1/10
+        assert target.prescribed_weights(prefix, dim, year_weights, True)[3] == 1/10
+        assert target.prescribed_weights(prefix, dim, year_weights, True)[7] == 4/10
+        assert target.prescribed_weights(prefix, dim, year_weights, True)[9] == 4/10
 
         # Test the Location dimension.
         dim = target.dimensions[2]
 
         # Descend into the first part of the Quality partition and the last part of the Year partition.
-        d = target.bins[0][9]
+        prefix = (0, 9)
 
         # Test with an invalid list of weights (wrong length).
         location_weights = [2, 1, 2, 1, 0, 0]
         with pytest.raises(ValueError):
-            target.prescribed_weights(d, dim, location_weights, False)
+            target.prescribed_weights(prefix, dim, location_weights, False)
 
         # Test with an invalid list of weights (wrong nonzero when bins are empty).
         location_weights = [2, 1, 2, 1, 0, 0, 0, 0]
         with pytest.raises(ValueError):
-            assert target.prescribed_weights(d, dim, location_weights, False)
+            assert target.prescribed_weights(prefix, dim, location_weights, False)
 
         location_weights = [0, 0, 2, 1, 0, 0, 0, 0]
 
@@ -296,16 +416,16 @@ class BinCollectionTest(unittest.TestCase):
         for i in range(8):
             if i not in [2, 3, 5]:
                 with pytest.raises(KeyError):
-                    target.prescribed_weights(d, dim, location_weights, False)[i]
+                    target.prescribed_weights(prefix, dim, location_weights, False)[i]
 
         # Weights do not depend on the unit counts. They are prescribed.
-        assert target.prescribed_weights(d, dim, location_weights, False)[2] == 2
-        assert target.prescribed_weights(d, dim, location_weights, False)[3] == 1
-        assert target.prescribed_weights(d, dim, location_weights, False)[5] == 0
+        assert target.prescribed_weights(prefix, dim, location_weights, False)[2] == 2
+        assert target.prescribed_weights(prefix, dim, location_weights, False)[3] == 1
+        assert target.prescribed_weights(prefix, dim, location_weights, False)[5] == 0
        
-        assert target.prescribed_weights(d, dim, location_weights, True)[2] == 2/3
-        assert target.prescribed_weights(d, dim, location_weights, True)[3] == 1/3
-        assert target.prescribed_weights(d, dim, location_weights, True)[5] == 0
+        assert target.prescribed_weights(prefix, dim, location_weights, True)[2] == 2/3
+        assert target.prescribed_weights(prefix, dim, location_weights, True)[3] == 1/3
+        assert target.prescribed_weights(prefix, dim, location_weights, True)[5] == 0
 
 
     def test_select_bin(self):
@@ -321,7 +441,7 @@ class BinCollectionTest(unittest.TestCase):
         # With seed = 147, 96 bins are created.
         assert target.count_bins() == 96
 
-        npseed(seed)
+        set_rng(default_rng(seed))
         bin = target.select_bin()
         assert isinstance(bin, Bin)
         assert bin.dimensions() == target.dimensions
@@ -332,7 +452,7 @@ class BinCollectionTest(unittest.TestCase):
         location_weights = [2, 1, 2, 1, 0, 0, 0, 0]
         weights = (quality_weights, year_weights, location_weights)
 
-        npseed(seed)
+        set_rng(default_rng(seed))
         # With only 100 units in the population, these weights cannot be prescribed
         # because some bins (or bin slices) having non-zero weights are empty.
         with pytest.raises(ValueError):
@@ -347,7 +467,7 @@ class BinCollectionTest(unittest.TestCase):
         # With seed = 147 and size = 5000, 798 bins are created.
         assert target.count_bins() == 798
 
-        npseed(seed)
+        set_rng(default_rng(seed))
         # With 5000 units in the population, the above weights can be prescribed.
         bin = target.select_bin(weights)
         assert isinstance(bin, Bin)
@@ -355,7 +475,7 @@ class BinCollectionTest(unittest.TestCase):
 
         # Test select_bin with a weights argument having None entries.
         weights = (None, year_weights, None)
-        npseed(seed)
+        set_rng(default_rng(seed))
 
         bin = target.select_bin(weights)
         assert isinstance(bin, Bin)
@@ -365,12 +485,12 @@ class BinCollectionTest(unittest.TestCase):
 
         # Construct a populated BinCollection.
         seed = 147
-        size = 6000
+        size = 4200
         target = self.construct_target(assign=True, size=size, seed=seed)
         assert target.count_units() == size
 
         k = 100
-        npseed(seed)
+        set_rng(default_rng(seed))
         result = target.select_units(k)
 
         assert isinstance(result, set)
@@ -378,6 +498,11 @@ class BinCollectionTest(unittest.TestCase):
         for unit in result:
             assert isinstance(unit, str)
 
+        # One seed determines the whole selection, including the units
+        # picked within each bin.
+        set_rng(default_rng(seed))
+        assert target.select_units(k) == result
+
         # Test select_units with prescribed bin weights.
         quality_weights = [1, 1, 1, 1, 1, 2, 2, 2, 2, 2]
         year_weights = [1, 1, 1, 1, 1, 1, 1, 4, 4, 4]
@@ -388,15 +513,15 @@ class BinCollectionTest(unittest.TestCase):
         with pytest.raises(ValueError):
             target.select_units(k, weights=year_weights)
 
-        # With seed = 147 and size = 6000, unit selection fails because at least
+        # With seed = 147 and size = 4200, unit selection fails because at least
         # one of the selected bins has too few units for selection without replacement.
-        npseed(seed)
+        set_rng(default_rng(seed))
         with pytest.raises(ValueError):
             target.select_units(k, weights=weights)
 
         # With seed = 147 and size = 12000, unit selection succeeds.
         size = 12000
-        npseed(seed)
+        set_rng(default_rng(seed))
         target = self.construct_target(assign=True, size=size, seed=seed)
         assert target.count_units() == size
 
@@ -409,7 +534,7 @@ class BinCollectionTest(unittest.TestCase):
 
         # Test select_units with a weights argument having None entries.
         weights = (None, year_weights, None)
-        npseed(seed)
+        set_rng(default_rng(seed))
 
         result = target.select_units(k, weights=weights)
 
@@ -418,5 +543,9 @@ class BinCollectionTest(unittest.TestCase):
         for unit in result:
             assert isinstance(unit, str)
 
+        # Weighted selection is reproducible from the seed alone too.
+        set_rng(default_rng(seed))
+        assert target.select_units(k, weights=weights) == result
+
 if __name__ == '__main__':
     unittest.main()
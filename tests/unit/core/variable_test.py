@@ -151,6 +151,19 @@ class VariableTestCase(unittest.TestCase):
         assert target.part_containing(0.999) == 9
         assert target.part_containing(1) == None
 
+        # Non-finite values belong to no interval.
+        assert target.part_containing(float('nan')) == None
+        assert target.part_containing(float('inf')) == None
+        assert target.part_containing(float('-inf')) == None
+
+        # The part_containing_many method locates a whole column of
+        # values, with -1 for values contained in no interval. The
+        # Fraction edges here are not float-representable, so this
+        # exercises the scalar fallback path.
+        result = target.part_containing_many(
+            [-0.1, 0, 0.05, 0.15, 0.999, 1, float('nan')])
+        assert result.tolist() == [-1, 0, 0, 1, 9, -1, -1]
+
         # Now test a continuous variable of type int.
         target = CtsVar("Word count", type="int")
         assert isinstance(target, CtsVar)
@@ -182,6 +195,12 @@ class VariableTestCase(unittest.TestCase):
         assert target.part_containing(135000) == 9
         assert target.part_containing(150000) == None
 
+        # The integer edges are exactly representable as floats, so
+        # part_containing_many takes the vectorised path.
+        result = target.part_containing_many(
+            [-1, 0, 14999, 15000, 77461, 135000, 150000])
+        assert result.tolist() == [-1, 0, 0, 1, 5, 9, -1]
+
     def test_discrete_variable(self):
 
         target = DisVar("Year")
@@ -211,6 +230,14 @@ class VariableTestCase(unittest.TestCase):
         assert target.part_containing(1899) == 9
         assert target.part_containing(1900) == None
 
+        # Bucket contents need not be integers.
+        target = DisVar("Score", type="float")
+        target.partition = [(0.1, 0.2), (0.3, 0.4)]
+
+        assert target.part_containing(0.2) == 0
+        assert target.part_containing(0.3) == 1
+        assert target.part_containing(0.5) == None
+
     def test_categorical_variable(self):
 
         target = CatVar("location")
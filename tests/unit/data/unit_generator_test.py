@@ -6,7 +6,7 @@ from pandas import read_csv  # type: ignore
 from io import StringIO
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def articles_query_result():
 
     data = StringIO(
@@ -22,7 +22,12 @@ def articles_query_result():
         0002325,"The Poole and South-Western Herald, etc.","Poole, Dorset, England",1864-06-09,1864,0002325/1864/0609,1156,0.7865,,art0012,0002325/1864/0609/art0012
         0002325,"The Poole and South-Western Herald, etc.","Poole, Dorset, England",1864-06-09,1864,0002325/1864/0609,1577,0.4233,LVKDIG?OS.,art0033,0002325/1864/0609/art0033
         """)
-    return read_csv(data, sep=",")
+    # Explicit dtypes skip the per-column type inference pass.
+    # ocr_quality_mean stays float64: narrowing it would perturb values
+    # compared exactly against bin boundaries downstream.
+    return read_csv(data, sep=",", parse_dates=["issue_date"],
+                    dtype={"year": "int16", "word_count": "int32",
+                           "ocr_quality_mean": "float64"})
 
 
 def test_generate_units(articles_query_result):
@@ -55,15 +60,18 @@ def test_generate_units(articles_query_result):
     # The values are (year, word_count, ocr_quality_mean).
     assert results[8][1] == (1864, 1156, 0.7865)
 
+    # Materialise the rows once, instead of building a Series per
+    # iteration with iloc.
+    rows = list(articles_query_result.itertuples(index=False))
     for i in range(0, len(results)):
-        row = articles_query_result.iloc[i]
+        row = rows[i]
 
         # Check the unit identifiers.
-        assert results[i][0] == row['article_id']
+        assert results[i][0] == row.article_id
 
         # Check the unit values.
         assert results[i][1] == (
-            row['year'], row['word_count'], row['ocr_quality_mean'])
+            row.year, row.word_count, row.ocr_quality_mean)
 
         # Check the types of the unit values.
         for j in range(0, len(variables)):